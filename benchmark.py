@@ -1,17 +1,26 @@
 import timeit
 import csv
-import matplotlib.pyplot as plt
+import os
+import sys
+from Bio import SeqIO
 from processing.processing import Sequential, OpenMP, Multithread, Multiprocess
+from processing.cost_model import build_profile
 
 num_iter = 1
 num_rep = 1
 filename = "benchmark.csv"
 results = []
+measurements = []
 
 input_file = "ls_orchid.gbk"
+sample_file = "sample.gbk"
+sample_size = 20
 temp_file = "temp.fasta"
 output_file = "aligned.txt"
 
+# Com --no-plot os gráficos não são gerados e o matplotlib não é importado
+plot = "--no-plot" not in sys.argv
+
 
 def benchmark(method, num_iter, num_rep):
     """
@@ -41,61 +50,84 @@ def benchmark(method, num_iter, num_rep):
         total_time += (end_time - start_time)
     return total_time / num_rep
 
-seq = Sequential(input_file, temp_file, output_file)
+def plot_results(results, image_file):
+    """
+    Gera um gráfico de barras com o tempo médio de execução de cada método e o salva em um arquivo.
+
+    Parametros:
+        results: Lista de resultados no formato [método, CPUs, tempo].
+        image_file: Caminho para o arquivo de imagem.
+    """
+    import matplotlib.pyplot as plt
+
+    methods = [result[0] for result in results]
+    cpus = [result[1] for result in results]
+    speeds = [result[2] for result in results]
+
+    plt.figure(figsize=(12, 6))
+    plt.barh([f'{method} (CPU: {cpu})' for method, cpu in zip(methods, cpus)], speeds)
+    plt.xlabel('Média do tempo de execução (s)')
+    plt.ylabel('Método')
+    plt.title('Resultados')
+
+    plt.gca().invert_yaxis()
 
-seq_time = benchmark(seq, num_iter, num_rep)
-results.append(['Sequential', 1, seq_time])
+    plt.tight_layout()
 
-for cpu in range(1, 17, 2):
-    thread = Multithread(input_file, temp_file, output_file, cpu)
-    omp = OpenMP(input_file, temp_file, output_file, cpu)
-    process = Multiprocess(input_file, temp_file, output_file, cpu)
+    plt.savefig(image_file)
 
-    thread_time = benchmark(thread, num_iter, num_rep)
-    results.append(['Multithread', cpu, thread_time])
+# Os workers podem ser criados com spawn ou forkserver, que importam este módulo novamente:
+# o benchmark só é executado quando o arquivo é o programa principal.
+if __name__ == "__main__":
+    # Uma amostra menor da entrada permite separar o custo fixo de cada modo do custo por alinhamento
+    # no perfil de calibração usado pelo modo automático do servidor.
+    records = list(SeqIO.parse(input_file, "genbank"))
+    SeqIO.write(records[:sample_size], sample_file, "genbank")
 
-    #omp_time = benchmark(omp, num_iter, num_rep)
-    #results.append(['OpenMP', cpu, omp_time])
+    lengths = [len(record.seq) for record in records]
+    sample_lengths = lengths[:sample_size]
 
-    process_time = benchmark(process, num_iter, num_rep)
-    results.append(['Multiprocess', cpu, process_time])
+    seq = Sequential(input_file, temp_file, output_file)
 
-with open(filename, mode='w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerows(results)
+    seq_time = benchmark(seq, num_iter, num_rep)
+    results.append(['Sequential', 1, seq_time])
+    measurements.append(('Sequential', 1, lengths, seq_time))
 
+    seq_sample = Sequential(sample_file, temp_file, output_file)
+    measurements.append(('Sequential', 1, sample_lengths, benchmark(seq_sample, num_iter, num_rep)))
 
-methods = [result[0] for result in results]
-cpus = [result[1] for result in results]
-speeds = [result[2] for result in results]
+    for cpu in range(1, 17, 2):
+        thread = Multithread(input_file, temp_file, output_file, cpu)
+        omp = OpenMP(input_file, temp_file, output_file, cpu)
+        process = Multiprocess(input_file, temp_file, output_file, cpu)
 
-plt.figure(figsize=(12, 6))
-plt.barh([f'{method} (CPU: {cpu})' for method, cpu in zip(methods, cpus)], speeds)
-plt.xlabel('Média do tempo de execução (s)')
-plt.ylabel('Método')
-plt.title('Resultados')
+        thread_time = benchmark(thread, num_iter, num_rep)
+        results.append(['Multithread', cpu, thread_time])
+        measurements.append(('Multithread', cpu, lengths, thread_time))
 
-plt.gca().invert_yaxis()
+        thread_sample = Multithread(sample_file, temp_file, output_file, cpu)
+        measurements.append(('Multithread', cpu, sample_lengths, benchmark(thread_sample, num_iter, num_rep)))
 
-plt.tight_layout()
+        #omp_time = benchmark(omp, num_iter, num_rep)
+        #results.append(['OpenMP', cpu, omp_time])
+        #measurements.append(('OpenMP', cpu, lengths, omp_time))
 
-plt.savefig("benchmark.png")
+        process_time = benchmark(process, num_iter, num_rep)
+        results.append(['Multiprocess', cpu, process_time])
+        measurements.append(('Multiprocess', cpu, lengths, process_time))
 
-results = sorted(results, key=lambda x: x[2])
-results = results[:10]
+        process_sample = Multiprocess(sample_file, temp_file, output_file, cpu)
+        measurements.append(('Multiprocess', cpu, sample_lengths, benchmark(process_sample, num_iter, num_rep)))
 
-methods = [result[0] for result in results]
-cpus = [result[1] for result in results]
-speeds = [result[2] for result in results]
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerows(results)
 
-plt.figure(figsize=(12, 6))
-plt.barh([f'{method} (CPU: {cpu})' for method, cpu in zip(methods, cpus)], speeds)
-plt.xlabel('Média do tempo de execução (s)')
-plt.ylabel('Método')
-plt.title('Resultados')
+    build_profile(measurements)
 
-plt.gca().invert_yaxis()
+    os.remove(sample_file)
 
-plt.tight_layout()
 
-plt.savefig("top10.png")
\ No newline at end of file
+    if plot:
+        plot_results(results, "benchmark.png")
+        plot_results(sorted(results, key=lambda x: x[2])[:10], "top10.png")
@@ -1,26 +1,99 @@
+import os
 from tcp_client import TCPClient
 
 def main():
     """
     Função principal que inicia o cliente TCP e envia um arquivo para o servidor.
 
-    O usuário deve digitar o modo de operação desejado (sequencial, multithread, OpenMP ou multiprocess),
-    a quantidade de threads/processos para utilizar, o local do arquivo para ser enviado e o local do arquivo
+    O usuário deve digitar o modo de operação desejado (sequencial, multithread, OpenMP, multiprocess ou
+    automático), a quantidade de threads/processos para utilizar (exceto no modo automático, em que o servidor
+    escolhe), o local do arquivo para ser enviado e o local do arquivo
     para ser recebido.
+
+    Também é possível registrar um dataset de referência no servidor (modo 6) e alinhar um lote de arquivos
+    de consulta contra um dataset registrado (modo 7), sem reenviar a referência.
     """
     host = "127.0.0.1"
     port = 31337
     client = TCPClient(host, port)
     client.connect()
 
-    modo = (input("Digite o modo de operação desejado:\n\n1.Sequencial\n2.Multithread\n3.OpenMP\n4.Multiprocess\n"))
+    modo = (input("Digite o modo de operação desejado:\n\n1.Sequencial\n2.Multithread\n3.OpenMP\n4.Multiprocess\n5.Automático\n6.Registrar dataset de referência\n7.Alinhar contra dataset de referência\n"))
 
     client.send_mode(modo)
     
-    parallel = (input("Digite a quantidade de threads/processos para utilizar:"))
+    if modo.strip() in ("5", "6"):
+        parallel = "0"
+    else:
+        parallel = (input("Digite a quantidade de threads/processos para utilizar:"))
 
     client.send_parallel(parallel)
 
+    if modo.strip() == "6":
+        client.send_dataset(input("Digite o nome do dataset:"))
+
+        file = input("Digite o local do arquivo do dataset para ser enviado:")
+
+        print("Enviando o dataset para o servidor")
+
+        client.upload_file(file)
+
+        client.receive_message()
+
+        client.close()
+
+        exit()
+
+    if modo.strip() == "7":
+        client.send_dataset(input("Digite o nome do dataset:"))
+
+        # O servidor verifica o dataset antes de receber as consultas
+        try:
+            status = client.receive_status()
+        except ConnectionError as ce:
+            status = f"Erro de conexão: {ce}"
+
+        if status != "OK":
+            print(status)
+            client.close()
+            exit()
+
+        files = input("Digite os locais dos arquivos de consulta para serem enviados, separados por vírgula:")
+        files = [file.strip() for file in files.split(",") if file.strip()]
+
+        missing = [file for file in files if not os.path.exists(file)]
+        if missing:
+            print(f"Arquivos não encontrados: {', '.join(missing)}")
+            client.close()
+            exit()
+
+        client.send_file_count(len(files))
+
+        rec = input("Digite o local do arquivo para ser recebido:")
+
+        print("Enviando os arquivos para o servidor")
+
+        for file in files:
+            client.upload_file(file)
+
+        try:
+            status = client.receive_status()
+        except ConnectionError as ce:
+            status = f"Erro de conexão: {ce}"
+
+        if status != "OK":
+            print(status)
+            client.close()
+            exit()
+
+        print("Recebendo arquivo do servidor")
+
+        client.download_file(rec)
+
+        client.close()
+
+        exit()
+
     file = input("Digite o local do arquivo para ser enviado:")
 
     rec = input("Digite o local do arquivo para ser recebido:")
@@ -1,6 +1,10 @@
 import socket
 import os
 
+# Tamanho fixo do cabeçalho com o tamanho de cada mensagem e de cada arquivo trocados com o servidor
+HEADER_SIZE = 8
+FILE_HEADER_SIZE = 16
+
 class TCPClient:
     """Classe que representa um cliente TCP.
 
@@ -11,10 +15,15 @@ class TCPClient:
 
     Métodos:
         connect(): Conecta o cliente ao servidor.
+        send_message(message: str): Envia uma mensagem precedida pelo seu tamanho.
         send_mode(mode: str): Envia o modo de operação para o servidor.
         send_parallel(parallel: str): Envia o número de paralelismo para o servidor.
+        send_dataset(name: str): Envia o nome de um dataset de referência para o servidor.
+        send_file_count(count: int): Envia o número de arquivos do lote para o servidor.
         upload_file(file_path: str): Envia um arquivo para o servidor.
         download_file(file_path: str): Recebe um arquivo do servidor.
+        receive_status(): Recebe a mensagem de estado do job enviada pelo servidor.
+        receive_message(): Recebe a mensagem final do servidor.
         close(): Fecha a conexão com o servidor.
     """
 
@@ -32,6 +41,18 @@ class TCPClient:
             print(f"Erro ao conectar com o servidor: {e}")
             self.server_socket.close()
 
+    def send_message(self, message):
+        """Envia uma mensagem para o servidor, precedida pelo seu tamanho em bytes com HEADER_SIZE dígitos.
+
+        Como o TCP não preserva os limites entre envios, o servidor usa o cabeçalho para ler exatamente
+        uma mensagem, mesmo que várias cheguem juntas.
+
+        Parametros:
+            message (str): A mensagem.
+        """
+        data = message.encode("utf-8")
+        self.server_socket.sendall(f"{len(data):0{HEADER_SIZE}d}".encode() + data)
+
     def send_mode(self, mode):
         """Envia o modo de operação para o servidor.
 
@@ -42,7 +63,7 @@ class TCPClient:
             ConnectionError: Se houver um erro de conexão.
         """
         try:
-            self.server_socket.send(mode.encode("utf-8"))
+            self.send_message(mode.strip())
         except Exception as e:
             print(f"Erro ao enviar o modo de operação para o servidor: {e}")
             self.server_socket.close()
@@ -58,12 +79,44 @@ class TCPClient:
             ConnectionError: Se houver um erro de conexão.
         """
         try:
-            self.server_socket.send(parallel.encode("utf-8"))
+            self.send_message(parallel.strip())
         except Exception as e:
             print(f"Erro ao enviar número de paralelismo para o servidor: {e}")
             self.server_socket.close()
             exit()
 
+    def send_dataset(self, name):
+        """Envia o nome de um dataset de referência para o servidor.
+
+        Parametros:
+            name (str): O nome do dataset.
+
+        Errors:
+            ConnectionError: Se houver um erro de conexão.
+        """
+        try:
+            self.send_message(name.strip())
+        except Exception as e:
+            print(f"Erro ao enviar o nome do dataset para o servidor: {e}")
+            self.server_socket.close()
+            exit()
+
+    def send_file_count(self, count):
+        """Envia o número de arquivos do lote para o servidor.
+
+        Parametros:
+            count (int): O número de arquivos.
+
+        Errors:
+            ConnectionError: Se houver um erro de conexão.
+        """
+        try:
+            self.send_message(str(count))
+        except Exception as e:
+            print(f"Erro ao enviar o número de arquivos para o servidor: {e}")
+            self.server_socket.close()
+            exit()
+
     def upload_file(self, file_path):
         """Envia um arquivo para o servidor.
 
@@ -77,7 +130,7 @@ class TCPClient:
         try:
             file_size = os.path.getsize(file_path)
             
-            self.server_socket.send(str(file_size).encode())
+            self.server_socket.sendall(f"{file_size:0{FILE_HEADER_SIZE}d}".encode())
 
             with open(file_path, 'rb') as file:
                 file_data = file.read()
@@ -122,6 +175,49 @@ class TCPClient:
         except Exception as e:
             print(f"Erro ao receber o arquivo: {e}")
 
+    def receive_status(self):
+        """Recebe a mensagem de estado do job, precedida pelo seu tamanho em bytes com HEADER_SIZE dígitos.
+
+        Retorno:
+            "OK" se o job pode continuar (o dataset está registrado ou o resultado vem a seguir),
+            ou a mensagem de erro do servidor.
+
+        Errors:
+            ConnectionError: Se a conexão for fechada antes da mensagem chegar.
+        """
+        size = int(self.receive_exact(HEADER_SIZE))
+        return self.receive_exact(size).decode("utf-8")
+
+    def receive_exact(self, size):
+        """Recebe exatamente size bytes do servidor.
+
+        Errors:
+            ConnectionError: Se a conexão for fechada antes de todos os bytes chegarem.
+        """
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.server_socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("conexão fechada pelo servidor")
+            data += chunk
+        return bytes(data)
+
+    def receive_message(self):
+        """Recebe a mensagem final do servidor e a exibe.
+
+        Errors:
+            ConnectionError: Se houver um erro de conexão.
+        """
+        try:
+            message = b""
+            while True:
+                data = self.server_socket.recv(1024)
+                if not data:
+                    break
+                message += data
+            print(message.decode("utf-8"))
+        except ConnectionError as ce:
+            print(f"Erro de conexão: {ce}")
 
     def close(self):
         """Fecha a conexão com o servidor."""
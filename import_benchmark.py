@@ -0,0 +1,92 @@
+import statistics
+import subprocess
+import sys
+import timeit
+
+from processing.processing import worker_context
+
+num_rep = 10
+
+# Metas, em segundos, para a mediana de cada medição
+client_target = 0.1
+worker_target = 0.05
+
+
+def cold_start(code, num_rep):
+    """
+    Mede o tempo de um interpretador Python novo executando o código fornecido, incluindo a inicialização do interpretador.
+
+    Parametros:
+        code: O código a ser executado com python -c.
+        num_rep: O número de repetições a serem executadas.
+
+    Retorno:
+        A mediana dos tempos de execução em segundos.
+    """
+    times = []
+    for _ in range(num_rep):
+        start_time = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(timeit.default_timer() - start_time)
+    return statistics.median(times)
+
+
+def align_one():
+    """
+    Trabalho mínimo de um worker: importa o Biopython e alinha um par de sequências curtas.
+    """
+    from Bio import Align
+
+    Align.PairwiseAligner().align("ACGT", "AGT")
+
+
+def worker_spawn(num_rep):
+    """
+    Mede o tempo entre criar um processo worker (com o mesmo contexto de Multiprocess.process) e o seu término,
+    executando align_one. Com fork, o resultado depende dos módulos que o processo pai já importou.
+
+    Parametros:
+        num_rep: O número de repetições a serem executadas.
+
+    Retorno:
+        A mediana dos tempos em segundos.
+    """
+    times = []
+    for _ in range(num_rep):
+        start_time = timeit.default_timer()
+        process = worker_context().Process(target=align_one)
+        process.start()
+        process.join()
+        times.append(timeit.default_timer() - start_time)
+    return statistics.median(times)
+
+
+def report(name, seconds, target=None):
+    """
+    Exibe o tempo medido e, se houver uma meta, se ela foi atingida.
+    """
+    if target is None:
+        print(f"{name}: {seconds * 1000:.1f} ms")
+    else:
+        status = "OK" if seconds <= target else "ACIMA DA META"
+        print(f"{name}: {seconds * 1000:.1f} ms (meta {target * 1000:.0f} ms) {status}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        # Executado em um interpretador novo para que o processo pai comece sem o Biopython importado
+        if "--preload" in sys.argv:
+            from processing.processing import preload
+            preload()
+        print(worker_spawn(num_rep))
+        sys.exit()
+
+    report("Interpretador vazio", cold_start("pass", num_rep))
+    report("Cliente (tcp_client)", cold_start("import sys; sys.path.insert(0, 'client'); import tcp_client", num_rep), client_target)
+    report("processing.processing sem Biopython", cold_start("import processing.processing, sys; assert 'Bio' not in sys.modules", num_rep))
+
+    cold = subprocess.run([sys.executable, __file__, "--worker"], check=True, capture_output=True, text=True)
+    report("Worker sem pré-carregamento", float(cold.stdout))
+
+    preloaded = subprocess.run([sys.executable, __file__, "--worker", "--preload"], check=True, capture_output=True, text=True)
+    report("Worker com pré-carregamento", float(preloaded.stdout), worker_target)
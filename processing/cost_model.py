@@ -0,0 +1,255 @@
+import json
+import os
+import platform
+
+PROFILE_FILE = "calibration.json"
+
+class CostModel:
+    """
+    Classe que estima o custo de um job de alinhamento e escolhe o modo de execução e o número de workers.
+
+    O custo de um alinhamento par a par é proporcional ao produto dos tamanhos das duas sequências,
+    então o custo de um job é medido em células (soma de len(a) * len(b) sobre os pares alinhados).
+    Para cada combinação de modo e paralelismo medida pelo benchmark, o perfil de calibração guarda
+    um custo fixo (overhead, em segundos) e uma taxa (segundos por célula).
+
+    Parametros:
+    ----------
+    profile_file : str
+        Caminho para o perfil de calibração gerado pelo benchmark.py.
+
+    Métodos:
+    -------
+    load_profile()
+        Carrega o perfil de calibração, se existir.
+    estimate(lengths)
+        Estima o tempo de execução de cada entrada do perfil para os tamanhos de sequência fornecidos.
+    choose(input_file)
+        Lê o arquivo de entrada e escolhe a entrada do perfil com o menor tempo previsto.
+    """
+
+    def __init__(self, profile_file=PROFILE_FILE):
+        self.profile_file = profile_file
+        self.entries = self.load_profile()
+
+    def load_profile(self):
+        """
+        Carrega as entradas do perfil de calibração.
+        Retorna uma lista vazia se o perfil não existir.
+        """
+        if not os.path.exists(self.profile_file):
+            return []
+
+        with open(self.profile_file, "r") as file:
+            profile = json.load(file)
+
+        return profile["entries"]
+
+    def estimate(self, lengths):
+        """
+        Estima o tempo de execução de cada entrada do perfil.
+
+        Parametros:
+            lengths (list): Tamanhos das sequências do arquivo de entrada, na ordem em que aparecem.
+
+        Retorno:
+            Lista de tuplas (tempo previsto, modo, paralelismo), ordenada pelo tempo previsto.
+        """
+        estimates = []
+
+        for entry in self.entries:
+            cells = job_cells(lengths, entry["method"], entry["parallel"])
+            predicted = entry["overhead"] + entry["rate"] * cells
+            estimates.append((predicted, entry["method"], entry["parallel"]))
+
+        return sorted(estimates)
+
+    def choose(self, input_file):
+        """
+        Escolhe o modo de execução e o paralelismo para o arquivo de entrada.
+
+        Sem perfil de calibração, usa o modo sequencial para entradas pequenas e o modo multiprocess
+        com um processo por CPU para as demais, e o tempo previsto é None.
+
+        Parametros:
+            input_file (str): Caminho para o arquivo de entrada no formato GenBank.
+
+        Retorno:
+            Tupla (modo, paralelismo, tempo previsto).
+        """
+        lengths = genbank_lengths(input_file)
+
+        estimates = self.estimate(lengths)
+        if estimates:
+            predicted, method, parallel = estimates[0]
+            return method, parallel, predicted
+
+        if len(lengths) < 2 * (os.cpu_count() or 1):
+            return "Sequential", 1, None
+        return "Multiprocess", os.cpu_count() or 1, None
+
+def genbank_lengths(input_file):
+    """
+    Retorna os tamanhos das sequências de um arquivo GenBank, lidos das linhas LOCUS.
+
+    Isso evita converter o arquivo inteiro com o SeqIO apenas para escolher o modo de execução, já que
+    o arquivo é convertido novamente pelo processamento. Se alguma linha LOCUS não tiver o tamanho,
+    o arquivo é lido com o SeqIO.
+
+    Parametros:
+        input_file (str): Caminho para o arquivo no formato GenBank.
+    """
+    lengths = []
+
+    with open(input_file, "r") as file:
+        for line in file:
+            if not line.startswith("LOCUS"):
+                continue
+
+            fields = line.split()
+            units = [n for n, field in enumerate(fields) if field in ("bp", "aa")]
+            if not units or not fields[units[0] - 1].isdigit():
+                from Bio import SeqIO
+
+                return [len(record.seq) for record in SeqIO.parse(input_file, "genbank")]
+
+            lengths.append(int(fields[units[0] - 1]))
+
+    return lengths
+
+def pair_cells(lengths):
+    """
+    Retorna a soma de len(a) * len(b) sobre todos os pares de sequências com a < b.
+    """
+    total = sum(lengths)
+    squares = sum(length * length for length in lengths)
+    return (total * total - squares) // 2
+
+def job_cells(lengths, method, parallel):
+    """
+    Retorna o custo em células do caminho crítico de um job.
+
+    Todos os modos alinham o mesmo conjunto de pares (todos os pares a < b). No modo sequencial eles são
+    alinhados por um único worker; nos modos paralelos cada worker alinha um intervalo contíguo de pares
+    (como em Parallel.alignment_pairs), então o custo é o do worker mais carregado.
+
+    Parametros:
+        lengths (list): Tamanhos das sequências, na ordem do arquivo de entrada.
+        method (str): Nome da classe de processamento.
+        parallel (int): Número de threads/processos.
+    """
+    if method == "Sequential":
+        return pair_cells(lengths)
+
+    return max(cells for _, _, cells in pair_ranges(lengths, parallel))
+
+def pair_ranges(lengths, parallel):
+    """
+    Divide os pares de sequências a < b, numerados na ordem de Sequential.perform_alignment, em parallel
+    intervalos contíguos com custos em células próximos. Um intervalo pode começar ou terminar no meio
+    dos pares de uma sequência, então há trabalho para todos os workers mesmo com poucas sequências.
+
+    Parametros:
+        lengths (list): Tamanhos das sequências, na ordem do arquivo de entrada.
+        parallel (int): Número de intervalos.
+
+    Retorno:
+        Lista de tuplas (primeiro par, par seguinte ao último, células), uma por worker.
+    """
+    n = len(lengths)
+    total = pair_cells(lengths)
+    bounds = [(0, 0)]
+    cells = 0
+    first = 0
+    remaining = sum(lengths)
+
+    for j in range(n):
+        remaining -= lengths[j]
+        row_end = cells + lengths[j] * remaining
+
+        # Algum limite cai dentro dos pares da sequência j: percorre os pares até alcançá-lo
+        if len(bounds) < parallel and total * len(bounds) / parallel < row_end:
+            for k in range(j + 1, n):
+                while len(bounds) < parallel and cells >= total * len(bounds) / parallel:
+                    bounds.append((first + k - j - 1, cells))
+                cells += lengths[j] * lengths[k]
+
+        cells = row_end
+        first += n - j - 1
+
+    while len(bounds) <= parallel:
+        bounds.append((first, cells))
+
+    return [(start, stop, stop_cells - start_cells) for (start, start_cells), (stop, stop_cells) in zip(bounds, bounds[1:])]
+
+def split_costs(costs, parallel):
+    """
+    Divide uma lista de itens em parallel intervalos contíguos com custos próximos.
+
+    Parametros:
+        costs (list): Custo de cada item.
+        parallel (int): Número de intervalos.
+
+    Retorno:
+        Lista de tuplas (primeiro item, item seguinte ao último, custo), uma por worker.
+    """
+    total = sum(costs)
+    bounds = [(0, 0)]
+    cells = 0
+
+    for n, cost in enumerate(costs):
+        while len(bounds) < parallel and cells >= total * len(bounds) / parallel:
+            bounds.append((n, cells))
+        cells += cost
+
+    while len(bounds) <= parallel:
+        bounds.append((len(costs), cells))
+
+    return [(start, stop, stop_cells - start_cells) for (start, start_cells), (stop, stop_cells) in zip(bounds, bounds[1:])]
+
+def build_profile(measurements, profile_file=PROFILE_FILE):
+    """
+    Ajusta o overhead e a taxa de cada combinação de modo e paralelismo e salva o perfil de calibração.
+
+    Cada combinação deve ter sido medida com pelo menos uma entrada; com duas ou mais entradas de
+    tamanhos diferentes é feito um ajuste linear (mínimos quadrados) do tempo em função das células.
+
+    Parametros:
+        measurements (list): Lista de tuplas (modo, paralelismo, tamanhos das sequências, tempo em segundos).
+        profile_file (str): Caminho para o perfil de calibração.
+    """
+    points = {}
+    for method, parallel, lengths, seconds in measurements:
+        cells = job_cells(lengths, method, parallel)
+        points.setdefault((method, parallel), []).append((cells, seconds))
+
+    entries = []
+    for (method, parallel), samples in points.items():
+        overhead, rate = fit_line(samples)
+        entries.append({"method": method, "parallel": parallel, "overhead": overhead, "rate": rate})
+
+    with open(profile_file, "w") as file:
+        json.dump({"host": platform.node(), "cpus": os.cpu_count(), "entries": entries}, file, indent=2)
+
+def fit_line(samples):
+    """
+    Ajusta tempo = overhead + taxa * células por mínimos quadrados, sem valores negativos.
+
+    Parametros:
+        samples (list): Lista de tuplas (células, tempo em segundos).
+
+    Retorno:
+        Tupla (overhead, taxa).
+    """
+    n = len(samples)
+    mean_cells = sum(cells for cells, _ in samples) / n
+    mean_seconds = sum(seconds for _, seconds in samples) / n
+    variance = sum((cells - mean_cells) ** 2 for cells, _ in samples)
+
+    if variance == 0:
+        return 0.0, mean_seconds / mean_cells if mean_cells else 0.0
+
+    rate = sum((cells - mean_cells) * (seconds - mean_seconds) for cells, seconds in samples) / variance
+    rate = max(rate, 0.0)
+    overhead = max(mean_seconds - rate * mean_cells, 0.0)
+    return overhead, rate
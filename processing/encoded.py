@@ -0,0 +1,230 @@
+import numpy as np
+
+ALPHABETS = {
+    "dna": "ACGTN",
+    "protein": "ACDEFGHIKLMNPQRSTVWYX",
+}
+
+class EncodedSequences:
+    """
+    Classe que guarda um conjunto de sequências codificadas como inteiros em um único array NumPy contíguo.
+
+    Cada símbolo é convertido para o seu índice no alfabeto (uint8); símbolos fora do alfabeto, incluindo
+    gaps ('-'), recebem o índice do último símbolo (N para DNA, X para proteínas), o curinga. Posições em que
+    uma das sequências tem o curinga não são comparadas por hamming() e identity(): N contra N não conta
+    como igual nem como diferente. A sequência i ocupa codes[offsets[i]:offsets[i + 1]].
+    As métricas abaixo são calculadas para todos os registros ou pares de uma vez, sem objetos Seq nem
+    formatação de strings, e os arrays podem ser passados diretamente para kernels compilados.
+
+    Parametros:
+    ----------
+    sequences : list
+        Sequências (str ou Seq).
+    ids : list
+        Identificadores das sequências.
+    alphabet : str
+        "dna" ou "protein".
+
+    Métodos:
+    -------
+    from_file(path, format, alphabet)
+        Lê as sequências de um arquivo com o Biopython.
+    sequence(i)
+        Decodifica a sequência i.
+    composition()
+        Conta os símbolos de cada sequência.
+    gc_content()
+        Fração de G e C de cada sequência de DNA.
+    pairs()
+        Índices de todos os pares (i, j) com i < j.
+    hamming(i, j)
+        Distância de Hamming de pares de sequências de mesmo tamanho.
+    identity(i, j)
+        Identidade sem gaps de pares de sequências.
+    """
+
+    def __init__(self, sequences, ids=None, alphabet="dna", chunk_size=1 << 22):
+        self.alphabet = ALPHABETS[alphabet]
+        self.wildcard = len(self.alphabet) - 1
+        self.ids = list(ids) if ids is not None else [str(i) for i in range(len(sequences))]
+        self.chunk_size = chunk_size
+
+        table = np.full(256, self.wildcard, dtype=np.uint8)
+        for code, symbol in enumerate(self.alphabet):
+            table[ord(symbol)] = code
+            table[ord(symbol.lower())] = code
+
+        text = "".join(str(sequence) for sequence in sequences).encode("ascii")
+        self.codes = table[np.frombuffer(text, dtype=np.uint8)]
+
+        self.lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+        self.offsets = np.zeros(len(self.lengths) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=self.offsets[1:])
+
+    @classmethod
+    def from_file(cls, path, format="fasta", alphabet="dna"):
+        """
+        Lê as sequências de um arquivo com o Biopython e as codifica.
+
+        Parametros:
+            path (str): Caminho para o arquivo.
+            format (str): Formato do arquivo, como em SeqIO.parse ("fasta", "genbank", ...).
+            alphabet (str): "dna" ou "protein".
+        """
+        from Bio import SeqIO
+
+        records = list(SeqIO.parse(path, format))
+        return cls([record.seq for record in records], [record.id for record in records], alphabet)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def sequence(self, i):
+        """Decodifica a sequência i para uma string."""
+        symbols = np.frombuffer(self.alphabet.encode("ascii"), dtype=np.uint8)
+        return symbols[self.codes[self.offsets[i]:self.offsets[i + 1]]].tobytes().decode("ascii")
+
+    def composition(self):
+        """
+        Conta os símbolos de cada sequência.
+
+        Retorno:
+            Array (número de sequências, tamanho do alfabeto) com as contagens, na ordem do alfabeto.
+        """
+        size = len(self.alphabet)
+        records = np.repeat(np.arange(len(self), dtype=np.int64), self.lengths)
+        counts = np.bincount(records * size + self.codes, minlength=len(self) * size)
+        return counts.reshape(len(self), size)
+
+    def gc_content(self):
+        """
+        Retorna a fração de G e C de cada sequência de DNA (0 para sequências vazias).
+        """
+        if self.alphabet != ALPHABETS["dna"]:
+            raise ValueError("gc_content só é definido para o alfabeto de DNA")
+
+        counts = self.composition()
+        gc = counts[:, self.alphabet.index("G")] + counts[:, self.alphabet.index("C")]
+        return np.divide(gc, self.lengths, out=np.zeros(len(self)), where=self.lengths > 0)
+
+    def pairs(self):
+        """
+        Retorna os índices (i, j) de todos os pares de sequências com i < j, na mesma ordem dos laços
+        de Sequential.perform_alignment.
+        """
+        return np.triu_indices(len(self), k=1)
+
+    def hamming(self, i, j):
+        """
+        Calcula a distância de Hamming de cada par (i[k], j[k]): o número de posições diferentes entre as
+        posições comparadas (sem curinga em nenhuma das duas sequências).
+
+        Parametros:
+            i (array): Índices da primeira sequência de cada par.
+            j (array): Índices da segunda sequência de cada par.
+
+        Exceções:
+            ValueError: Se algum par tiver sequências de tamanhos diferentes.
+        """
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+
+        lengths = self.lengths[i]
+        if np.any(lengths != self.lengths[j]):
+            raise ValueError("A distância de Hamming exige pares de sequências de mesmo tamanho")
+
+        matches, compared = self._compare(i, j, lengths)
+        return compared - matches
+
+    def identity(self, i, j):
+        """
+        Calcula a identidade sem gaps de cada par (i[k], j[k]): a fração de posições iguais entre as duas
+        sequências, comparando posição a posição até o tamanho da menor. Posições com curinga ficam fora
+        do numerador e do denominador (0 se não houver nenhuma posição comparada).
+
+        Parametros:
+            i (array): Índices da primeira sequência de cada par.
+            j (array): Índices da segunda sequência de cada par.
+        """
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+
+        lengths = np.minimum(self.lengths[i], self.lengths[j])
+        matches, compared = self._compare(i, j, lengths)
+        return np.divide(matches, compared, out=np.zeros(len(lengths)), where=compared > 0)
+
+    def _compare(self, i, j, lengths):
+        """
+        Compara os primeiros lengths[k] símbolos de cada par (i[k], j[k]).
+
+        Retorno:
+            Tupla (posições iguais, posições comparadas), ignorando as posições com curinga.
+        """
+        if len(lengths) and np.all(lengths == lengths[0]) and np.all(self.lengths[i] == lengths[0]) \
+                and np.all(self.lengths[j] == lengths[0]):
+            return self._compare_equal(i, j, int(lengths[0]))
+        return self._compare_ragged(i, j, lengths)
+
+    def _compare_equal(self, i, j, length):
+        """
+        Compara pares em que as duas sequências têm o mesmo tamanho length. As sequências de cada bloco de
+        pares são copiadas como linhas de uma matriz e comparadas diretamente, sem índices por posição.
+        """
+        matches = np.zeros(len(i), dtype=np.int64)
+        compared = np.zeros(len(i), dtype=np.int64)
+
+        if np.all(self.lengths == length):
+            # Todas as sequências têm o mesmo tamanho: codes é uma matriz com uma sequência por linha
+            rows = self.codes.reshape(len(self), length)
+            columns = None
+        else:
+            rows = self.codes
+            columns = np.arange(length, dtype=np.int64)
+
+        step = max(self.chunk_size // max(length, 1), 1)
+        for start in range(0, len(i), step):
+            stop = start + step
+            if columns is None:
+                a = rows[i[start:stop]]
+                b = rows[j[start:stop]]
+            else:
+                a = rows[self.offsets[i[start:stop], None] + columns]
+                b = rows[self.offsets[j[start:stop], None] + columns]
+
+            valid = (a != self.wildcard) & (b != self.wildcard)
+            matches[start:stop] = np.count_nonzero((a == b) & valid, axis=1)
+            compared[start:stop] = np.count_nonzero(valid, axis=1)
+
+        return matches, compared
+
+    def _compare_ragged(self, i, j, lengths):
+        """
+        Compara pares de tamanhos variados, concatenando as posições de todos os pares de um bloco.
+        Os pares são processados em blocos de até chunk_size posições para limitar a memória usada.
+        """
+        matches = np.zeros(len(lengths), dtype=np.int64)
+        compared = np.zeros(len(lengths), dtype=np.int64)
+        ends = np.cumsum(lengths)
+
+        start = 0
+        while start < len(lengths):
+            base = ends[start - 1] if start else 0
+            stop = max(int(np.searchsorted(ends, base + self.chunk_size, side="right")), start + 1)
+
+            chunk = lengths[start:stop]
+            chunk_starts = np.cumsum(chunk) - chunk
+            positions = np.arange(int(chunk.sum()), dtype=np.int64) - np.repeat(chunk_starts, chunk)
+
+            a = self.codes[np.repeat(self.offsets[i[start:stop]], chunk) + positions]
+            b = self.codes[np.repeat(self.offsets[j[start:stop]], chunk) + positions]
+            valid = (a != self.wildcard) & (b != self.wildcard)
+
+            chunk_ends = chunk_starts + chunk
+            for totals, flags in ((matches, (a == b) & valid), (compared, valid)):
+                counts = np.zeros(len(flags) + 1, dtype=np.int64)
+                np.cumsum(flags, out=counts[1:])
+                totals[start:stop] = counts[chunk_ends] - counts[chunk_starts]
+
+            start = stop
+
+        return matches, compared
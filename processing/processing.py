@@ -1,9 +1,45 @@
-from Bio import SeqIO, Align
 import os
+import sys
 import threading
 import multiprocessing
+from itertools import islice
+from processing.cost_model import pair_ranges, split_costs
 #from numba.openmp import openmp_context as openmp
 
+# Os módulos do Biopython são importados dentro dos métodos que os utilizam, para que processos de curta
+# duração (cliente, benchmark sem gráficos, workers) não paguem a importação sem necessidade.
+
+def preload():
+    """
+    Importa os módulos do Biopython usados no processamento.
+
+    Deve ser chamada uma vez em processos de longa duração, como o servidor, antes de criar os workers:
+    os processos criados por worker_context() com fork herdam os módulos já importados e não precisam
+    importá-los novamente.
+    """
+    from Bio import SeqIO, Align
+
+def worker_context():
+    """
+    Retorna o contexto de multiprocessing usado para criar os workers.
+
+    No Linux usa fork, para que os workers herdem os módulos carregados por preload() (o padrão passa a
+    ser forkserver a partir do Python 3.14). Nas demais plataformas o fork não é seguro (no macOS o padrão
+    é spawn justamente por isso), então usa forkserver quando disponível, com o Biopython pré-carregado
+    no servidor de processos, e o contexto padrão caso contrário. Com spawn e forkserver o módulo
+    principal é importado novamente em cada worker, então scripts que criam workers devem executar o
+    seu código sob if __name__ == "__main__".
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["Bio.SeqIO", "Bio.Align"])
+        return context
+
+    return multiprocessing.get_context()
+
 class Processing:
     """
     Classe responsável por processar arquivos de sequências genéticas.
@@ -33,6 +69,8 @@ class Processing:
         """
         Converte as sequências genéticas do arquivo de entrada no formato GenBank para o formato FASTA e as salva no arquivo temporário.
         """
+        from Bio import SeqIO
+
         sequences = SeqIO.parse(self.input_file, "genbank")
         SeqIO.write(sequences, self.temp_file, "fasta")
 
@@ -64,6 +102,8 @@ class Sequential(Processing):
         Realiza o alinhamento de sequências utilizando o módulo Align do Biopython.
         Salva o resultado do alinhamento em um arquivo de saída.
         """
+        from Bio import SeqIO, Align
+
         aligner = Align.PairwiseAligner()
         alignments = []
         
@@ -97,38 +137,37 @@ class Parallel(Processing):
         temp_file (str): Caminho para o arquivo temporário.
         output_file (str): Caminho para o arquivo de saída.
         parallel (int): Número de processos paralelos.
+        resume (bool): Se verdadeiro, retoma o trabalho a partir dos checkpoints de uma execução interrompida.
+        checkpoint_every (int): Número de pares alinhados entre dois checkpoints.
+
+    Os workers alinham os mesmos pares que Sequential: cada worker recebe um intervalo contíguo dos pares,
+    com custos próximos, e os arquivos de saída são concatenados na ordem dos workers, então a saída é
+    idêntica à de Sequential para qualquer paralelismo.
+
+    Cada worker grava os alinhamentos concluídos no seu arquivo de saída a cada checkpoint_every pares e
+    registra em output_file_i.ckpt quantos pares concluiu e o tamanho do arquivo de saída nesse ponto.
+    Ao retomar, o arquivo de saída é truncado nesse tamanho e os pares já concluídos são pulados, então
+    a saída final é idêntica à de uma execução sem interrupção com o mesmo paralelismo.
 
     Métodos:
-        convert_genbank_to_fasta(): Converte o arquivo de entrada do formato GenBank para o formato Fasta.
-        join_files(): Concatena os arquivos temporários gerados pelo método convert_genbank_to_fasta().
-        cleanup_files(): Remove os arquivos temporários gerados pelo método convert_genbank_to_fasta().
-        perform_alignment(i): Realiza o alinhamento de sequências do arquivo temporário i.
+        join_files(): Concatena os arquivos de saída dos workers.
+        cleanup_files(): Remove os arquivos temporários e de saída criados durante o processamento.
+        alignment_pairs(i): Gera os pares de sequências a serem alinhados pelo worker i.
+        perform_alignment(i): Realiza o alinhamento dos pares do worker i.
+        read_checkpoint(i): Lê o checkpoint do worker i.
+        write_checkpoint(i, done, size): Grava o checkpoint do worker i.
+        write_alignments(file, alignments): Escreve os alinhamentos concluídos no arquivo de saída do worker.
     """
 
-    def __init__(self, input_file, temp_file, output_file, parallel=4):
+    def __init__(self, input_file, temp_file, output_file, parallel=4, resume=False, checkpoint_every=100):
         super().__init__(input_file, temp_file, output_file)
         self.parallel = parallel
-
-    def convert_genbank_to_fasta(self):
-        """
-        Converte o arquivo de entrada do formato GenBank para o formato Fasta.
-        Divide o arquivo em partes e escreve cada parte em um arquivo temporário.
-        """
-        sequences = SeqIO.parse(self.input_file, "genbank")
-
-        output_files = [f"{self.temp_file}_{i}" for i in range(self.parallel)]
-    
-        output_handles = [open(file, "w") for file in output_files]
-    
-        for i, record in enumerate(sequences):
-            output_handles[i % self.parallel].write(">" + record.id + "\n" + str(record.seq) + "\n")
-            
-        for handle in output_handles:
-            handle.close()
+        self.resume = resume
+        self.checkpoint_every = checkpoint_every
 
     def join_files(self):
         """
-        Concatena os arquivos temporários gerados pelo método convert_genbank_to_fasta().
+        Concatena os arquivos de saída dos workers, na ordem dos workers.
         Escreve o resultado no arquivo de saída.
         """
         file_contents = []
@@ -144,37 +183,119 @@ class Parallel(Processing):
 
     def cleanup_files(self):
         """
-        Remove os arquivos temporários gerados pelo método convert_genbank_to_fasta().
+        Remove os arquivos temporários e de saída criados durante o processamento.
         """
-        for i in range(self.parallel):
-            os.remove(f"{self.temp_file}_{i}")
+        os.remove(self.temp_file)
 
         for i in range(self.parallel):
             os.remove(f"{self.output_file}_{i}")
-    
+
+        for i in range(self.parallel):
+            if os.path.exists(f"{self.output_file}_{i}.ckpt"):
+                os.remove(f"{self.output_file}_{i}.ckpt")
+
+    def alignment_pairs(self, i):
+        """
+        Gera os pares de sequências a serem alinhados pelo worker i, sempre na mesma ordem: o intervalo i
+        de pair_ranges() dos pares a < b, na ordem de Sequential.perform_alignment.
+
+        Parametros:
+            i (int): Índice do worker.
+
+        Retorno:
+            Gerador de tuplas (sequência a, sequência b, índices dos alinhamentos a serem escritos).
+        """
+        from Bio import SeqIO
+
+        sequences = list(SeqIO.parse(self.temp_file, "fasta"))
+        start, stop, _ = pair_ranges([len(sequence) for sequence in sequences], self.parallel)[i]
+
+        pairs = ((j, k) for j in range(len(sequences)) for k in range(j+1, len(sequences)))
+
+        for j, k in islice(pairs, start, stop):
+            yield sequences[j].seq, sequences[k].seq, (0, 1)
+
+    def read_checkpoint(self, i):
+        """
+        Lê o checkpoint do worker i.
+
+        Retorno:
+            Tupla (pares concluídos, tamanho do arquivo de saída em bytes), ou (0, 0) se não houver
+            checkpoint ou se a execução não estiver sendo retomada.
+        """
+        checkpoint_file = f"{self.output_file}_{i}.ckpt"
+        if not self.resume or not os.path.exists(checkpoint_file) or not os.path.exists(f"{self.output_file}_{i}"):
+            return 0, 0
+
+        with open(checkpoint_file, "r") as file:
+            done, size = file.read().split()
+
+        return int(done), int(size)
+
+    def write_checkpoint(self, i, done, size):
+        """
+        Grava o checkpoint do worker i. O arquivo é substituído de forma atômica, então um checkpoint
+        lido depois de uma interrupção é sempre o anterior ou o novo, nunca um arquivo pela metade.
+
+        Parametros:
+            i (int): Índice do worker.
+            done (int): Número de pares concluídos.
+            size (int): Tamanho do arquivo de saída em bytes após esses pares.
+        """
+        checkpoint_file = f"{self.output_file}_{i}.ckpt"
+
+        with open(checkpoint_file + ".tmp", "w") as file:
+            file.write(f"{done} {size}\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(checkpoint_file + ".tmp", checkpoint_file)
+
     def perform_alignment(self, i):
         """
-        Realiza o alinhamento de sequências do arquivo temporário i.
-        Escreve o resultado no arquivo de saída correspondente.
+        Realiza o alinhamento dos pares do worker i.
+        Escreve o resultado no arquivo de saída correspondente, gravando um checkpoint a cada
+        checkpoint_every pares e pulando os pares já concluídos ao retomar.
         
         Parametros:
-            i (int): Índice do arquivo temporário a ser processado.
+            i (int): Índice do worker.
         """
+        from Bio import Align
+
         aligner = Align.PairwiseAligner()
         alignments = []
-        
-        sequences = list(SeqIO.parse(f"{self.temp_file}_{i}", "fasta"))
 
-        for j in range(len(sequences)):
-            for k in range(j+1, len(sequences)):
-                alignment = aligner.align(sequences[j].seq, sequences[k].seq)
+        done, size = self.read_checkpoint(i)
 
-                alignments.extend([alignment[0].__format__("fasta"), alignment[k].__format__("fasta")])
+        with open(f"{self.output_file}_{i}", "r+b" if done else "wb") as file:
+            # Descarta o que foi escrito depois do último checkpoint
+            file.truncate(size)
+            file.seek(size)
 
-        with open(f"{self.output_file}_{i}", "w") as file:
-            for aligned_pair in alignments:
-                file.write(str(aligned_pair) + "\n")
-            file.close()
+            pairs = islice(self.alignment_pairs(i), done, None)
+
+            for done, (a, b, indices) in enumerate(pairs, start=done + 1):
+                alignment = aligner.align(a, b)
+
+                alignments.extend([alignment[n].__format__("fasta") for n in indices])
+
+                if done % self.checkpoint_every == 0:
+                    self.write_alignments(file, alignments)
+                    self.write_checkpoint(i, done, file.tell())
+                    alignments = []
+
+            self.write_alignments(file, alignments)
+            self.write_checkpoint(i, done, file.tell())
+
+    def write_alignments(self, file, alignments):
+        """
+        Escreve os alinhamentos no arquivo de saída (aberto em modo binário) e garante que eles estejam
+        no disco antes do checkpoint correspondente ser gravado.
+        """
+        for aligned_pair in alignments:
+            file.write((str(aligned_pair) + "\n").encode())
+        file.flush()
+        os.fsync(file.fileno())
 
 class Multithread(Parallel):
     """Realiza o processamento de dados utilizando threads.
@@ -195,13 +316,21 @@ class Multithread(Parallel):
         o formato Fasta e, em seguida, cria uma thread para cada processador disponível no sistema. Cada thread
         executa o método `perform_alignment` da classe `Parallel` com um índice diferente. Por fim, as threads
         são aguardadas para que o processo seja finalizado e os arquivos gerados sejam unidos em um único arquivo.
+        Se alguma thread falhar, a exceção é repassada sem unir os arquivos, mantendo os checkpoints.
         """
         threads = []
+        errors = []
+
+        def align(i):
+            try:
+                self.perform_alignment(i)
+            except Exception as e:
+                errors.append(e)
 
         self.convert_genbank_to_fasta()
 
         for i in range(self.parallel):
-            align_thread = threading.Thread(target=self.perform_alignment, args=(i,))
+            align_thread = threading.Thread(target=align, args=(i,))
             threads.extend([align_thread])
         
         for thread in threads:
@@ -210,6 +339,9 @@ class Multithread(Parallel):
         for thread in threads:
             thread.join()
 
+        if errors:
+            raise errors[0]
+
         self.join_files()
 
 class OpenMP(Parallel):
@@ -271,13 +403,20 @@ class Multiprocess(Parallel):
         Este método realiza o processamento de dados utilizando processos. Ele converte o arquivo de entrada
         para o formato FASTA e, em seguida, inicia um processo para cada um dos alinhamentos a serem realizados.
         Por fim, ele junta os arquivos de saída gerados pelos processos em um único arquivo de saída.
+        Se algum processo terminar com erro, uma exceção é lançada sem unir os arquivos, mantendo os checkpoints.
+
+        Exceções:
+            RuntimeError: Se algum processo terminar com código de saída diferente de zero.
         """
         processes = []
 
+        # Importa o Biopython antes de criar os processos para que eles o herdem
+        preload()
+
         self.convert_genbank_to_fasta()
 
         for i in range(self.parallel):
-            align_process = multiprocessing.Process(target=self.perform_alignment, args=(i,))
+            align_process = worker_context().Process(target=self.perform_alignment, args=(i,))
             processes.extend([align_process])
 
         for process in processes:
@@ -286,4 +425,58 @@ class Multiprocess(Parallel):
         for process in processes:
             process.join()
 
-        self.join_files()
\ No newline at end of file
+        failed = [i for i, process in enumerate(processes) if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Os processos {failed} terminaram com erro; o resultado não foi gerado")
+
+        self.join_files()
+
+class CrossAlignment(Multiprocess):
+    """
+    Classe que alinha um conjunto de sequências de consulta contra um conjunto de referência já convertido
+    para FASTA (por exemplo, um dataset registrado no servidor), utilizando processos.
+
+    Diferente das outras classes, apenas os pares consulta x referência são alinhados. As consultas são
+    divididas entre os processos em intervalos contíguos de custo próximo e cada processo alinha a sua
+    parte contra todas as referências, então a saída segue a ordem das consultas.
+
+    Parametros:
+    ----------
+    input_file : str
+        Caminho para o arquivo de consultas no formato GenBank.
+    temp_file : str
+        Caminho para o arquivo temporário das consultas.
+    output_file : str
+        Caminho para o arquivo de saída.
+    reference_file : str
+        Caminho para o arquivo de referência no formato FASTA.
+    parallel : int
+        Número de processos a serem utilizados.
+    resume : bool
+        Se verdadeiro, retoma o trabalho a partir dos checkpoints de uma execução interrompida.
+    checkpoint_every : int
+        Número de pares alinhados entre dois checkpoints.
+    """
+
+    def __init__(self, input_file, temp_file, output_file, reference_file, parallel=4, resume=False, checkpoint_every=100):
+        super().__init__(input_file, temp_file, output_file, parallel, resume, checkpoint_every)
+        self.reference_file = reference_file
+
+    def alignment_pairs(self, i):
+        """
+        Gera os pares consulta x referência do worker i, sempre na mesma ordem.
+
+        Parametros:
+            i (int): Índice do worker.
+        """
+        from Bio import SeqIO
+
+        queries = list(SeqIO.parse(self.temp_file, "fasta"))
+        references = list(SeqIO.parse(self.reference_file, "fasta"))
+
+        reference_length = sum(len(reference) for reference in references)
+        start, stop, _ = split_costs([len(query) * reference_length for query in queries], self.parallel)[i]
+
+        for query in queries[start:stop]:
+            for reference in references:
+                yield query.seq, reference.seq, (0,)
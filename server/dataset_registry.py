@@ -0,0 +1,71 @@
+import os
+import re
+
+class DatasetRegistry:
+    """
+    Classe que mantém os datasets de referência registrados no servidor.
+
+    Cada dataset é enviado uma única vez no formato GenBank, convertido para FASTA e guardado no diretório
+    do registro com o nome escolhido pelo cliente. Os jobs seguintes usam o arquivo FASTA diretamente,
+    sem reenviar nem reconverter a referência.
+
+    Parametros:
+        directory (str): Diretório onde os datasets são guardados.
+
+    Métodos:
+        register(name, input_file): Converte o arquivo GenBank e guarda o dataset com o nome fornecido.
+        path(name): Retorna o caminho do arquivo FASTA do dataset.
+        exists(name): Verifica se o dataset está registrado.
+        names(): Retorna os nomes dos datasets registrados.
+    """
+
+    def __init__(self, directory="datasets"):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name):
+        """
+        Retorna o caminho do arquivo FASTA do dataset.
+
+        Exceções:
+            ValueError: Se o nome tiver caracteres diferentes de letras, números, '_', '-' e '.'.
+        """
+        if not re.fullmatch(r"[A-Za-z0-9_\-][A-Za-z0-9_.\-]*", name):
+            raise ValueError(f"Nome de dataset inválido: '{name}'")
+        return os.path.join(self.directory, f"{name}.fasta")
+
+    def exists(self, name):
+        """Verifica se o dataset está registrado."""
+        return os.path.exists(self.path(name))
+
+    def names(self):
+        """Retorna os nomes dos datasets registrados, em ordem alfabética."""
+        return sorted(file[:-len(".fasta")] for file in os.listdir(self.directory) if file.endswith(".fasta"))
+
+    def register(self, name, input_file):
+        """
+        Converte o arquivo GenBank para FASTA e guarda o dataset com o nome fornecido.
+        Um dataset com o mesmo nome é substituído. Se a conversão falhar, o arquivo temporário é removido
+        e o dataset anterior, se houver, é mantido.
+
+        Parametros:
+            name (str): Nome do dataset.
+            input_file (str): Caminho para o arquivo no formato GenBank.
+
+        Retorno:
+            O número de sequências do dataset.
+        """
+        from Bio import SeqIO
+
+        dataset_path = self.path(name)
+        temp_path = dataset_path + ".tmp"
+
+        try:
+            count = SeqIO.write(SeqIO.parse(input_file, "genbank"), temp_path, "fasta")
+            os.replace(temp_path, dataset_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return count
@@ -1,43 +1,70 @@
 import socket
 import os
 import sys 
+import time
+import timeit
+import hashlib
+import shutil
 sys.path.append(".")
 
-from processing.processing import Sequential, OpenMP, Multithread, Multiprocess
+# Tamanho fixo do cabeçalho com o tamanho de cada mensagem e de cada arquivo trocados com o cliente
+HEADER_SIZE = 8
+FILE_HEADER_SIZE = 16
+
+# Tempo, em segundos, sem atividade após o qual o diretório de um job interrompido é removido pelo clean()
+JOB_EXPIRY = 7 * 24 * 60 * 60
+
+from processing.processing import Sequential, OpenMP, Multithread, Multiprocess, CrossAlignment, preload
+from processing.cost_model import CostModel
+from dataset_registry import DatasetRegistry
 
 class TCPServer:
     """Classe que implementa um servidor TCP para processamento de sequências de DNA.
 
     A classe TCPServer é responsável por receber requisições de clientes e processar sequências de DNA
-    utilizando diferentes modos de operação (sequencial, multithread, multiprocess e OpenMP).
+    utilizando diferentes modos de operação (sequencial, multithread, multiprocess e OpenMP), ou escolhendo
+    o modo automaticamente a partir do perfil de calibração gerado pelo benchmark. Também mantém um registro
+    de datasets de referência, que são enviados uma única vez e usados em vários jobs de consulta x referência.
 
     Atributos:
         host (str): endereço IP do servidor.
         port (int): número da porta do servidor.
         server_socket (socket): socket do servidor.
+        registry (DatasetRegistry): registro de datasets de referência.
 
     Métodos:
         start(): Inicia o servidor e aguarda por requisições de clientes.
         handle_client(client_socket, client_address): Processa as requisições de um cliente.
-        clean(): Realiza a limpeza dos arquivos temporários gerados pelo processamento.
+        process_auto(): Escolhe o modo de operação e o paralelismo e processa o arquivo recebido.
+        register_dataset(client_socket): Recebe um dataset de referência e o guarda no registro.
+        process_dataset(client_socket, parallel): Recebe um lote de consultas e as alinha contra um dataset registrado.
+        job_dir(*key): Retorna o diretório do job do arquivo recebido, onde ficam os checkpoints.
+        receive_exact(client_socket, size): Recebe exatamente size bytes do cliente.
+        receive_message(client_socket): Recebe uma mensagem precedida pelo seu tamanho.
+        send_message(client_socket, message): Envia uma mensagem precedida pelo seu tamanho.
+        clean(): Realiza a limpeza dos arquivos temporários gerados pelo processamento e dos jobs expirados.
         download_file(client_socket): Recebe um arquivo enviado pelo cliente.
-        upload_file(client_socket): Envia um arquivo processado para o cliente.
+        upload_file(client_socket, file_path): Envia um arquivo processado para o cliente.
     """
 
     def __init__(self, host, port):
         self.host = host
         self.port = port
         self.server_socket = None
+        self.registry = DatasetRegistry()
 
     def start(self):
         """
         Inicia o servidor TCP na porta e host especificados no objeto.
         O servidor fica em loop aguardando por conexões de clientes e, quando uma conexão é estabelecida,
         o método handle_client é chamado para lidar com a conexão.
+        Antes de aceitar conexões, os módulos do Biopython são importados uma única vez, para que os jobs
+        e os processos criados por eles não paguem a importação.
         Se ocorrer algum erro durante a execução do servidor, uma mensagem de erro é exibida.
         """
         try:
             self.clean()
+            preload()
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(5)
@@ -64,16 +91,18 @@ class TCPServer:
         try:
             # Recebe o modo de operção do client
             print(f"Recebendo o modo de operação de: {client_address[0]}:{client_address[1]}")
-            mode = int(client_socket.recv(1024).decode("utf-8"))
+            mode = int(self.receive_message(client_socket))
 
             print(f"Recebendo o número de threads/procesos para utilizar de: {client_address[0]}:{client_address[1]}")
 
             # Recebe o número de threads/procesos para utilizar
-            parallel = int(client_socket.recv(1024).decode("utf-8"))
+            parallel = int(self.receive_message(client_socket))
             
-            print(f"Recebendo o arquivo de: {client_address[0]}:{client_address[1]}")
-            # Recebe o arquivo
-            self.download_file(client_socket)
+            # Os modos de dataset recebem o nome do dataset antes dos arquivos
+            if mode not in (6, 7):
+                print(f"Recebendo o arquivo de: {client_address[0]}:{client_address[1]}")
+                # Recebe o arquivo
+                self.download_file(client_socket)
 
             print(f"Inicializando o processamento para: {client_address[0]}:{client_address[1]}")
 
@@ -83,20 +112,38 @@ class TCPServer:
                 self.upload_file(client_socket)
                 seq.cleanup_files()
             elif mode == 2:
-                multi = Multithread("received", "temp.fasta", "aligned.txt", parallel)
+                job = self.job_dir(mode, parallel)
+                multi = Multithread("received", os.path.join(job, "temp.fasta"), os.path.join(job, "aligned.txt"), parallel, resume=True)
                 multi.process()
-                self.upload_file(client_socket)
+                self.upload_file(client_socket, multi.output_file)
                 multi.cleanup_files()
+                shutil.rmtree(job)
             elif mode == 3:
-                proc = Multiprocess("received", "temp.fasta", "aligned.txt", parallel)
+                job = self.job_dir(mode, parallel)
+                proc = Multiprocess("received", os.path.join(job, "temp.fasta"), os.path.join(job, "aligned.txt"), parallel, resume=True)
                 proc.process()
-                self.upload_file(client_socket)
+                self.upload_file(client_socket, proc.output_file)
                 proc.cleanup_files()
+                shutil.rmtree(job)
             elif mode == 4:
                 omp = OpenMP("received", "temp.fasta", "aligned.txt", parallel)
                 omp.process()
                 self.upload_file(client_socket)
                 omp.cleanup_files()
+            elif mode == 5:
+                auto = self.process_auto()
+                self.upload_file(client_socket, auto.output_file)
+                auto.cleanup_files()
+                shutil.rmtree(os.path.dirname(auto.output_file))
+            elif mode == 6:
+                self.register_dataset(client_socket)
+            elif mode == 7:
+                cross = self.process_dataset(client_socket, parallel)
+                if cross:
+                    self.send_message(client_socket, "OK")
+                    self.upload_file(client_socket, cross.output_file)
+                    cross.cleanup_files()
+                    shutil.rmtree(os.path.dirname(cross.output_file))
             else:
                 print("Nenhum dado recebido do client")
                 client_socket.close()
@@ -109,6 +156,168 @@ class TCPServer:
 
         except Exception as e:
             print(f"Erro com o client: {e}")
+            # Fecha a conexão para que o cliente não fique esperando por um resultado que não virá
+            client_socket.close()
+
+    def process_auto(self):
+        """
+        Escolhe o modo de operação e o número de threads/processos a partir do custo estimado do arquivo
+        recebido e realiza o processamento. O modo escolhido e os tempos previsto e real são exibidos;
+        o tempo real inclui a leitura dos tamanhos das sequências feita para a escolha. Os arquivos ficam
+        no diretório do job e os modos paralelos retomam um job interrompido a partir dos checkpoints.
+
+        Retorno:
+            O objeto de processamento utilizado, para que o resultado seja enviado e os arquivos gerados
+            possam ser removidos.
+        """
+        methods = {
+            "Sequential": Sequential,
+            "Multithread": Multithread,
+            "Multiprocess": Multiprocess,
+            "OpenMP": OpenMP,
+        }
+
+        start_time = timeit.default_timer()
+
+        method, parallel, predicted = CostModel().choose("received")
+
+        job = self.job_dir(5, method, parallel)
+        temp_file, output_file = os.path.join(job, "temp.fasta"), os.path.join(job, "aligned.txt")
+
+        if method == "Sequential":
+            proc = Sequential("received", temp_file, output_file)
+        else:
+            proc = methods[method]("received", temp_file, output_file, parallel, resume=True)
+
+        proc.process()
+        actual = timeit.default_timer() - start_time
+
+        if predicted is None:
+            print(f"Modo automático: {method} com {parallel} threads/processos (sem perfil de calibração), tempo real {actual:.3f}s")
+        else:
+            print(f"Modo automático: {method} com {parallel} threads/processos, tempo previsto {predicted:.3f}s, tempo real {actual:.3f}s")
+
+        return proc
+
+    def register_dataset(self, client_socket):
+        """
+        Recebe o nome e o arquivo GenBank de um dataset de referência, converte o arquivo para FASTA
+        e o guarda no registro. Um dataset com o mesmo nome é substituído.
+
+        Parâmetros:
+        client_socket (socket): Socket do cliente que está enviando o dataset.
+        """
+        name = self.receive_message(client_socket)
+        self.download_file(client_socket)
+
+        try:
+            count = self.registry.register(name, "received")
+            message = f"Dataset '{name}' registrado com {count} sequências"
+        except ValueError as e:
+            message = f"Erro ao registrar o dataset: {e}"
+
+        print(message)
+        client_socket.sendall((message + "\n").encode("utf-8"))
+
+    def process_dataset(self, client_socket, parallel):
+        """
+        Recebe o nome de um dataset registrado e um lote de arquivos de consulta, que são concatenados
+        em um único arquivo, e alinha as consultas contra as sequências do dataset. Logo após o nome, o
+        servidor responde "OK" ou, se o dataset não estiver registrado, uma mensagem de erro, e nesse caso
+        o cliente não envia os arquivos. Se algum arquivo não for recebido por completo, a exceção de
+        download_file interrompe o job.
+
+        Parâmetros:
+        client_socket (socket): Socket do cliente que está enviando as consultas.
+        parallel (int): Número de processos para utilizar.
+
+        Como nos modos multithread e multiprocess, os arquivos ficam no diretório do job, identificado
+        também pelo dataset, e um job interrompido é retomado a partir dos checkpoints.
+
+        Retorno:
+            O objeto de processamento utilizado, ou None se o dataset não estiver registrado.
+        """
+        name = self.receive_message(client_socket)
+
+        try:
+            registered = self.registry.exists(name)
+            error = None if registered else f"Dataset '{name}' não registrado. Registrados: {', '.join(self.registry.names())}"
+        except ValueError as e:
+            error = f"Erro com o dataset: {e}"
+
+        if error:
+            print(error)
+            self.send_message(client_socket, error)
+            return None
+
+        self.send_message(client_socket, "OK")
+
+        count = int(self.receive_message(client_socket))
+
+        for i in range(count):
+            self.download_file(client_socket, append=i > 0)
+
+        print(f"Alinhando {count} arquivo(s) de consulta contra o dataset '{name}'")
+        reference_file = self.registry.path(name)
+        # A data de modificação distingue um dataset registrado novamente com o mesmo nome
+        job = self.job_dir(7, name, os.stat(reference_file).st_mtime_ns, parallel)
+
+        cross = CrossAlignment("received", os.path.join(job, "temp.fasta"), os.path.join(job, "aligned.txt"),
+                               reference_file, max(parallel, 1), resume=True)
+        cross.process()
+        return cross
+
+    def job_dir(self, *key):
+        """
+        Retorna o diretório do job identificado pelo conteúdo do arquivo recebido e pelos valores de key,
+        criando-o se necessário. Os arquivos temporários e os checkpoints dos modos multithread, multiprocess,
+        automático e de dataset ficam nesse diretório: se o servidor for interrompido, o mesmo job enviado
+        novamente é retomado a partir dos checkpoints em vez de recomeçar do zero. O diretório é removido
+        quando o resultado é enviado, ou pelo clean() depois de JOB_EXPIRY segundos sem atividade.
+
+        Parâmetros:
+        key: Valores que identificam o job além do arquivo recebido, como o modo e o paralelismo.
+        """
+        digest = hashlib.sha256((" ".join(str(value) for value in key) + "\n").encode())
+        with open("received", "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+
+        job = os.path.join("jobs", digest.hexdigest()[:16])
+        if os.path.exists(job):
+            print(f"Retomando o job '{job}' a partir dos checkpoints")
+        os.makedirs(job, exist_ok=True)
+
+        return job
+
+    def receive_exact(self, client_socket, size):
+        """
+        Recebe exatamente size bytes do cliente.
+
+        Exceções:
+            ConnectionError: Se a conexão for fechada antes de todos os bytes chegarem.
+        """
+        data = bytearray()
+        while len(data) < size:
+            chunk = client_socket.recv(min(size - len(data), 65536))
+            if not chunk:
+                raise ConnectionError(f"conexão fechada após {len(data)} de {size} bytes")
+            data += chunk
+        return bytes(data)
+
+    def receive_message(self, client_socket):
+        """
+        Recebe uma mensagem do cliente, precedida pelo seu tamanho em bytes com HEADER_SIZE dígitos.
+        """
+        size = int(self.receive_exact(client_socket, HEADER_SIZE))
+        return self.receive_exact(client_socket, size).decode("utf-8")
+
+    def send_message(self, client_socket, message):
+        """
+        Envia uma mensagem para o cliente, precedida pelo seu tamanho em bytes com HEADER_SIZE dígitos.
+        """
+        data = message.encode("utf-8")
+        client_socket.sendall(f"{len(data):0{HEADER_SIZE}d}".encode() + data)
 
     def clean(self):
         """
@@ -116,64 +325,76 @@ class TCPServer:
 
         Este método verifica se os arquivos "aligned.txt" e "received" existem e, caso existam,
         os remove do sistema de arquivos. Esses arquivos são gerados durante o processamento
-        de sequências de DNA pelo servidor.
+        de sequências de DNA pelo servidor. Também remove os diretórios de jobs interrompidos que
+        não foram modificados nos últimos JOB_EXPIRY segundos, já que cada checkpoint gravado
+        atualiza a data de modificação do diretório.
         """
         if os.path.exists("aligned.txt"):
             os.remove("aligned.txt")
         if os.path.exists("received"):
             os.remove("received")
 
-    def download_file(self, client_socket):
+        if os.path.isdir("jobs"):
+            now = time.time()
+            for job in os.listdir("jobs"):
+                path = os.path.join("jobs", job)
+                if now - os.path.getmtime(path) > JOB_EXPIRY:
+                    print(f"Removendo o job expirado '{path}'")
+                    shutil.rmtree(path)
+
+    def download_file(self, client_socket, append=False):
         """
         Recebe um arquivo enviado pelo cliente através do socket fornecido e salva-o no diretório 'received'.
+        O arquivo é precedido pelo seu tamanho em bytes com FILE_HEADER_SIZE dígitos.
         
         Parâmetros:
         client_socket (socket): O socket conectado ao cliente que está enviando o arquivo.
+        append (bool): Se verdadeiro, o arquivo é adicionado ao final de 'received' em vez de substituí-lo.
         
         Exceções:
         ConnectionError: Se ocorrer um erro de conexão durante a transferência do arquivo.
         Exception: Se ocorrer um erro ao receber ou salvar o arquivo.
+        Em ambos os casos o erro é exibido e a exceção é repassada, para que o job seja interrompido.
         """
         try:
-            file_size_str = client_socket.recv(1024).decode()
-
-            file_size = int(file_size_str)
+            file_size = int(self.receive_exact(client_socket, FILE_HEADER_SIZE))
 
             save_path = "received"
 
-            with open(save_path, 'wb') as file:
-                received_data = b""
-                while len(received_data) < file_size:
-                    remaining_size = file_size - len(received_data)
-                    chunk = client_socket.recv(1024 if remaining_size > 1024 else remaining_size)
+            with open(save_path, 'ab' if append else 'wb') as file:
+                remaining_size = file_size
+                while remaining_size > 0:
+                    chunk = client_socket.recv(min(remaining_size, 65536))
                     if not chunk:
-                        break
-                    received_data += chunk
-                file.write(received_data)
+                        raise ConnectionError(f"conexão fechada após {file_size - remaining_size} de {file_size} bytes")
+                    file.write(chunk)
+                    remaining_size -= len(chunk)
 
             print(f"Arquivo recebido e salvo: '{save_path}'.")
         except ConnectionError as ce:
             print(f"Erro de conexão: {ce}")
+            raise
         except Exception as e:
             print(f"Erro ao receber o arquivo: {e}")
+            raise
 
-    def upload_file(self, client_socket):
+    def upload_file(self, client_socket, file_path="aligned.txt"):
         """
-        Envia um arquivo chamado 'aligned.txt' para o cliente conectado ao socket.
+        Envia um arquivo (por padrão 'aligned.txt') para o cliente conectado ao socket.
 
         Parâmetros:
             client_socket (socket): O socket do cliente conectado.
+            file_path (str): Caminho do arquivo a ser enviado.
 
         Erros:
             ConnectionError: Se ocorrer um erro de conexão durante o envio do arquivo.
             Exception: Se ocorrer um erro ao enviar o arquivo para o cliente.
         """
         try:
-            file_path = "aligned.txt"
             if os.path.exists(file_path):
                 with open(file_path, 'rb') as file:
                     file_data = file.read()
-                    client_socket.send(file_data)
+                    client_socket.sendall(file_data)
                 file.close()
                 print("Arquivo enviado para o cliente")
             else: